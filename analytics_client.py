@@ -0,0 +1,111 @@
+import os
+import time
+import httpx
+from utilities import compute_with_version
+
+# Client for the shared analytics API (api.py).
+# When ANALYTICS_API_URL is set, the chatbot tools (and the Streamlit dashboard) fetch their
+# numbers from the one warm API process instead of computing over the CSVs themselves.
+# Responses are kept until their Cache-Control max-age runs out, then revalidated with their ETag.
+
+class AnalyticsClient:
+    """Small ETag-aware client for the analytics API"""
+
+    def __init__(self, base_url: str, timeout: float = 30.0, transport=None):
+        self.client = httpx.Client(base_url=base_url, timeout=timeout, transport=transport)
+        # (path, query) -> (etag, expires_at, data, data_version)
+        self._cache = {}
+
+    def _get(self, path, params):
+        """
+        GET a JSON resource, serving it from cache while fresh and revalidating it with its ETag after.
+
+        Returns:
+            (data, data_version), where data_version is None for error responses
+        """
+        key = (path, tuple(sorted(params.items())))
+        cached = self._cache.get(key)
+        if cached and cached[1] > time.monotonic():
+            return cached[2], cached[3]
+
+        headers = {"If-None-Match": cached[0]} if cached else {}
+        response = self.client.get(path, params=params, headers=headers)
+
+        if response.status_code == 304:
+            data = cached[2]
+        elif response.status_code == 400:
+            # Analysis errors come back in the same {"error": ...} shape as the local functions
+            return response.json(), None
+        elif response.status_code == 422:
+            return {"error": f"Invalid parameters: {response.json()['detail']}"}, None
+        else:
+            response.raise_for_status()
+            data = response.json()
+
+        data_version = response.headers.get("X-Data-Version")
+        etag = response.headers.get("ETag")
+        if etag:
+            self._cache[key] = (etag, time.monotonic() + _max_age(response), data, data_version)
+        return data, data_version
+
+    def get_metric(self, metric: str, **params):
+        """
+        Fetch one metric, e.g. get_metric('benchmark-performance', year=2024, assessment_type='endline').
+
+        Returns:
+            The same dictionary the local analysis function returns
+        """
+        return self.get_metric_with_version(metric, **params)[0]
+
+    def get_metric_with_version(self, metric: str, **params):
+        """Like get_metric, but returns (data, data_version) for the data the result was computed from"""
+        params = {k: v for k, v in params.items() if v is not None}
+        return self._get(f"/api/metrics/{metric}", params)
+
+    def get_metrics(self, requests):
+        """
+        Fetch many metrics in one round trip.
+
+        Args:
+            requests: List of dictionaries with 'metric' and optional 'params'
+
+        Returns:
+            List of result dictionaries in the same order, each with 'metric', 'status' and 'data'
+            (plus 'etag' and 'data_version' for computed results)
+        """
+        response = self.client.post("/api/batch", json={"requests": requests})
+        response.raise_for_status()
+        return response.json()["results"]
+
+def _max_age(response):
+    for directive in response.headers.get("Cache-Control", "").split(","):
+        name, _, value = directive.strip().partition("=")
+        if name == "max-age" and value.isdigit():
+            return int(value)
+    return 0
+
+_client = None
+
+def get_client():
+    """Shared client for ANALYTICS_API_URL, or None when the API is not configured"""
+    global _client
+    base_url = os.environ.get("ANALYTICS_API_URL")
+    if not base_url:
+        return None
+    if _client is None or str(_client.client.base_url).rstrip("/") != base_url.rstrip("/"):
+        _client = AnalyticsClient(base_url)
+    return _client
+
+def run_analysis(metric: str, local_function, **params):
+    """Run an analysis on the shared analytics API when ANALYTICS_API_URL is set, otherwise locally"""
+    client = get_client()
+    if client is None:
+        return local_function(**params)
+    return client.get_metric(metric, **params)
+
+def run_analysis_with_version(metric: str, local_function, **params):
+    """Like run_analysis, but returns (result, data_version) for the data the result was computed from"""
+    client = get_client()
+    if client is None:
+        return compute_with_version(local_function, **params)
+    return client.get_metric_with_version(metric, **params)
@@ -0,0 +1,235 @@
+from dotenv import load_dotenv
+import os
+import json
+import math
+import hashlib
+from collections import OrderedDict
+from typing import Annotated, Literal, Optional
+import numpy as np
+import pandas as pd
+from fastapi import FastAPI, Query, Request, Response
+from pydantic import BaseModel, ConfigDict, Field, ValidationError, field_validator
+from utilities import get_data_version, compute_with_version
+from tools import number_of_children_2025
+from tools_2023_2024 import (
+    get_benchmark_performance,
+    calculate_improvement,
+    get_performance_breakdown,
+    get_improvement_distribution,
+    identify_students_needing_support,
+    get_summary_statistics,
+    analyze_program_effectiveness,
+    school_comparison_report,
+    get_data_info
+)
+
+load_dotenv(override=True)
+
+# Local JSON API over the analysis functions, so the chatbot and the Streamlit dashboard
+# share one warm process instead of each loading and computing over the CSVs.
+# Run with: python api.py  (then set ANALYTICS_API_URL=http://127.0.0.1:8000 for the clients)
+
+ANALYTICS_API_HOST = os.environ.get("ANALYTICS_API_HOST", "127.0.0.1")
+ANALYTICS_API_PORT = int(os.environ.get("ANALYTICS_API_PORT", 8000))
+ANALYTICS_CACHE_MAX_AGE = int(os.environ.get("ANALYTICS_CACHE_MAX_AGE", 300))
+MAX_BATCH_SIZE = 100
+
+Assessment = Literal['baseline', 'midline', 'endline']
+YEARS = (2023, 2024)
+
+# REQUEST PARAMETERS
+
+class MetricParams(BaseModel):
+    model_config = ConfigDict(extra='forbid')
+
+class YearParams(MetricParams):
+    # A plain int (not a Literal) so query string values like "2024" are coerced
+    year: int = 2024
+
+    @field_validator('year')
+    @classmethod
+    def check_year(cls, year):
+        if year not in YEARS:
+            raise ValueError(f"year must be one of {', '.join(map(str, YEARS))}")
+        return year
+
+class BenchmarkParams(YearParams):
+    assessment_type: Assessment = 'endline'
+    grade_filter: Optional[Literal['Grade R', 'Grade 1']] = None
+
+class ImprovementParams(YearParams):
+    start_assessment: Assessment = 'baseline'
+    end_assessment: Assessment = 'endline'
+
+class BreakdownParams(YearParams):
+    breakdown_by: Literal['School', 'Grade', 'Gender', 'Group', 'TA Name'] = 'School'
+    assessment_type: Assessment = 'endline'
+
+class SupportParams(YearParams):
+    assessment_type: Assessment = 'endline'
+    bottom_percentile: int = Field(25, ge=1, le=100)
+
+# metric name -> (analysis function, parameter model)
+METRICS = {
+    'benchmark-performance': (get_benchmark_performance, BenchmarkParams),
+    'improvement': (calculate_improvement, ImprovementParams),
+    'improvement-distribution': (get_improvement_distribution, ImprovementParams),
+    'performance-breakdown': (get_performance_breakdown, BreakdownParams),
+    'students-needing-support': (identify_students_needing_support, SupportParams),
+    'summary-statistics': (get_summary_statistics, YearParams),
+    'program-effectiveness': (analyze_program_effectiveness, YearParams),
+    'school-comparison': (school_comparison_report, YearParams),
+    'data-info': (get_data_info, YearParams),
+    'number-of-children-2025': (number_of_children_2025, MetricParams),
+}
+
+class MetricRequest(BaseModel):
+    metric: str
+    params: dict = {}
+
+class BatchRequest(BaseModel):
+    requests: list[MetricRequest] = Field(max_length=MAX_BATCH_SIZE)
+
+# RESULTS
+
+def _clean_json(value):
+    """Convert numpy scalars to Python values and NaN/NaT to None, so the output is strict JSON"""
+    if isinstance(value, dict):
+        return {str(k): _clean_json(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_clean_json(v) for v in value]
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, float) and not math.isfinite(value):
+        return None
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if pd.isna(value):
+        return None
+    return str(value)
+
+# (metric, params_json, data_version) -> (result, is_error), least recently used first
+_results = OrderedDict()
+MAX_CACHED_RESULTS = 512
+
+def _compute(metric, params_json):
+    """
+    Run a metric, memoized per data version.
+
+    Returns:
+        (result, is_error, data_version), where data_version is the version of the data the result was computed from
+    """
+    data_version = get_data_version()
+    key = (metric, params_json, data_version)
+    if key in _results:
+        _results.move_to_end(key)
+        return (*_results[key], data_version)
+
+    function, params_model = METRICS[metric]
+    params = params_model.model_validate_json(params_json)
+    result, data_version = compute_with_version(function, **params.model_dump())
+    result = _clean_json(result)
+    is_error = isinstance(result, dict) and 'error' in result
+
+    _results[(metric, params_json, data_version)] = (result, is_error)
+    if len(_results) > MAX_CACHED_RESULTS:
+        _results.popitem(last=False)
+    return result, is_error, data_version
+
+def _failure(e):
+    return {'error': f"Analysis failed: {e}"}
+
+def _json_response(content, status_code=200, headers=None):
+    return Response(json.dumps(content, allow_nan=False), status_code=status_code,
+                    media_type="application/json", headers=headers)
+
+def _etag(metric, params_json, data_version):
+    digest = hashlib.sha256(f"{metric}:{params_json}".encode()).hexdigest()[:16]
+    return f'"{data_version}-{digest}"'
+
+def _cache_headers(etag, data_version):
+    return {
+        "ETag": etag,
+        "Cache-Control": f"private, max-age={ANALYTICS_CACHE_MAX_AGE}",
+        # Lets clients key their own caches (e.g. rendered charts) on the data behind this response
+        "X-Data-Version": data_version
+    }
+
+def _etag_matches(request, etag):
+    if_none_match = request.headers.get("If-None-Match")
+    if not if_none_match:
+        return False
+    candidates = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    return "*" in candidates or etag in candidates
+
+# API
+
+app = FastAPI(title="Zazi iZandi Analytics API")
+
+@app.get("/api/version")
+def version(request: Request):
+    data_version = get_data_version()
+    etag = f'"{data_version}"'
+    if _etag_matches(request, etag):
+        return Response(status_code=304, headers=_cache_headers(etag, data_version))
+    return _json_response({"data_version": data_version, "metrics": sorted(METRICS)},
+                          headers=_cache_headers(etag, data_version))
+
+def _add_metric_route(metric, params_model):
+    def get_metric(request: Request, params: Annotated[params_model, Query()]):
+        params_json = params.model_dump_json()
+        data_version = get_data_version()
+        etag = _etag(metric, params_json, data_version)
+        # The ETag only depends on the request and the data version, so a match skips the analysis entirely
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers=_cache_headers(etag, data_version))
+
+        try:
+            result, is_error, data_version = _compute(metric, params_json)
+        except Exception as e:
+            return _json_response(_failure(e), status_code=500)
+        if is_error:
+            return _json_response(result, status_code=400)
+        # Tag the response with the version the result was actually computed from
+        etag = _etag(metric, params_json, data_version)
+        return _json_response(result, headers=_cache_headers(etag, data_version))
+
+    app.get(f"/api/metrics/{metric}", name=metric)(get_metric)
+
+for metric_name, (_, metric_params_model) in METRICS.items():
+    _add_metric_route(metric_name, metric_params_model)
+
+@app.post("/api/batch")
+def batch(batch_request: BatchRequest):
+    """Fetch many metrics in one round trip, e.g. everything a dashboard page needs"""
+    results = []
+    for item in batch_request.requests:
+        if item.metric not in METRICS:
+            results.append({'metric': item.metric, 'status': 404, 'data': {'error': f"Unknown metric: {item.metric}"}})
+            continue
+        try:
+            params_json = METRICS[item.metric][1].model_validate(item.params).model_dump_json()
+        except ValidationError as e:
+            errors = e.errors(include_url=False, include_context=False)
+            results.append({'metric': item.metric, 'status': 422, 'data': {'error': f"Invalid parameters: {errors}"}})
+            continue
+
+        try:
+            result, is_error, data_version = _compute(item.metric, params_json)
+        except Exception as e:
+            # One failing metric should not fail the rest of the batch
+            results.append({'metric': item.metric, 'status': 500, 'data': _failure(e)})
+            continue
+        results.append({
+            'metric': item.metric,
+            'status': 400 if is_error else 200,
+            'etag': None if is_error else _etag(item.metric, params_json, data_version),
+            'data_version': data_version,
+            'data': result
+        })
+
+    return _json_response({'results': results})
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host=ANALYTICS_API_HOST, port=ANALYTICS_API_PORT)
@@ -12,6 +12,7 @@ import gradio as gr
 from prompts import *
 from tools import *
 from tools_2023_2024 import *
+from charts import *
 
 load_dotenv(override=True)
 
@@ -31,7 +32,9 @@ zazi_2023_agent = Agent(
         get_summary_statistics_2023,
         analyze_program_effectiveness_2023,
         school_comparison_report_2023,
-        get_data_info_2023
+        get_data_info_2023,
+        chart_school_benchmarks_2023,
+        chart_improvement_distribution_2023
     ]
 )
 
@@ -47,7 +50,9 @@ zazi_2024_agent = Agent(
         get_summary_statistics_2024,
         analyze_program_effectiveness_2024,
         school_comparison_report_2024,
-        get_data_info_2024
+        get_data_info_2024,
+        chart_school_benchmarks_2024,
+        chart_improvement_distribution_2024
     ]
 )
 
@@ -71,8 +76,12 @@ zazi_supervisor = Agent(
 
 async def chat_async(message, history):
     # You could also parse history if needed
+    charts = start_chart_collection()
     result = await Runner.run(zazi_supervisor, message)
-    return str(result.final_output)
+    if not charts:
+        return str(result.final_output)
+    # Send the answer followed by any charts the agents rendered for it
+    return [str(result.final_output)] + [gr.Image(value=path) for path in charts]
 
 def chat(message, history):
     # Use the persistent event loop instead of creating a new one
@@ -0,0 +1,225 @@
+import os
+import json
+import hashlib
+import inspect
+import tempfile
+from contextvars import ContextVar
+import plotly.express as px
+from agents import function_tool
+from analytics_client import run_analysis_with_version
+from tools_2023_2024 import get_performance_breakdown, get_improvement_distribution
+
+# Rendered charts are cached on disk, keyed by the figure spec and the version of the data
+# the chart is drawn from, so asking the same question twice serves the existing file
+# instead of re-rendering.
+CHART_CACHE_DIR = os.environ.get("CHART_CACHE_DIR", "chart_cache")
+CHART_CACHE_MAX_BYTES = int(os.environ.get("CHART_CACHE_MAX_BYTES", 50 * 1024 * 1024))
+CHART_FORMATS = ('png', 'svg')
+
+# Charts rendered during the current chat turn, picked up by app.chat
+_rendered_charts = ContextVar("rendered_charts", default=None)
+
+def start_chart_collection():
+    """Start collecting the charts rendered during one chat turn"""
+    charts = []
+    _rendered_charts.set(charts)
+    return charts
+
+def _record_chart(path):
+    charts = _rendered_charts.get()
+    if charts is not None and path not in charts:
+        charts.append(path)
+
+# CHART CACHE
+
+def normalize_chart_spec(spec):
+    """
+    Fill in the default format and the chart's default parameters, so every way of
+    asking for the same chart maps to the same cache entry.
+    """
+    kind = spec.get('kind')
+    if kind not in CHART_BUILDERS:
+        raise ValueError(f"Unknown chart kind: {kind}")
+    normalized = {'kind': kind, 'format': spec.get('format', 'png')}
+    if normalized['format'] not in CHART_FORMATS:
+        raise ValueError(f"Unsupported chart format: {normalized['format']}")
+
+    params = {k: v for k, v in spec.items() if k not in ('kind', 'format')}
+    try:
+        bound = inspect.signature(CHART_BUILDERS[kind][0]).bind(**params)
+    except TypeError as e:
+        raise ValueError(f"Invalid parameters for {kind} chart: {e}")
+    bound.apply_defaults()
+    normalized.update(bound.arguments)
+    return normalized
+
+def chart_cache_key(spec, data_version):
+    """Content address for a normalized figure spec and the version of the data it is drawn from"""
+    payload = json.dumps({'spec': spec, 'data_version': data_version}, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+def _evict_charts(keep_path):
+    """Delete least recently used charts until the cache fits in CHART_CACHE_MAX_BYTES"""
+    entries = []
+    for name in os.listdir(CHART_CACHE_DIR):
+        path = os.path.join(CHART_CACHE_DIR, name)
+        if os.path.isfile(path) and name.endswith(CHART_FORMATS):
+            stat = os.stat(path)
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= CHART_CACHE_MAX_BYTES:
+            break
+        if path == keep_path:
+            continue
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        total -= size
+
+def render_chart(spec):
+    """
+    Render the chart described by spec to a static image, using the cache when possible.
+
+    Args:
+        spec: Dictionary with 'kind' (a key of CHART_BUILDERS), 'format' ('png' or 'svg')
+              and the parameters of that chart kind
+
+    Returns:
+        Path to the rendered image file
+    """
+    spec = normalize_chart_spec(spec)
+    image_format = spec['format']
+    params = {k: v for k, v in spec.items() if k not in ('kind', 'format')}
+    data_function, figure_function = CHART_BUILDERS[spec['kind']]
+
+    # Fetch the data first (cheap: memoized locally, or cached/revalidated from the API)
+    # so the cache key uses the version of exactly the data the chart would be drawn from
+    data, data_version = data_function(**params)
+    if isinstance(data, dict) and 'error' in data:
+        raise ValueError(data['error'])
+
+    os.makedirs(CHART_CACHE_DIR, exist_ok=True)
+    path = os.path.join(CHART_CACHE_DIR, f"{chart_cache_key(spec, data_version)}.{image_format}")
+
+    if os.path.exists(path):
+        # Touch the file so eviction treats it as recently used
+        os.utime(path)
+    else:
+        fig = figure_function(data, **params)
+        # Write to a temporary file first so readers never see a half-written image
+        fd, tmp_path = tempfile.mkstemp(dir=CHART_CACHE_DIR, suffix=f".{image_format}.tmp")
+        os.close(fd)
+        try:
+            fig.write_image(tmp_path, format=image_format)
+            # mkstemp creates the file owner-only; cached charts are served like any other static file
+            os.chmod(tmp_path, 0o644)
+            os.replace(tmp_path, path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        _evict_charts(path)
+
+    _record_chart(path)
+    return path
+
+# CHART BUILDERS
+# Each chart kind has a data function, returning (data, data_version), and a figure function
+# that draws the data. The data function's parameters are the chart's parameters.
+
+def school_benchmark_data(year=2024, assessment_type='endline'):
+    return run_analysis_with_version('performance-breakdown', get_performance_breakdown,
+                                     year=year, breakdown_by='School', assessment_type=assessment_type)
+
+def school_benchmark_chart(breakdown, year, assessment_type):
+    """Bar chart of the percent of children at benchmark per school, split by grade"""
+    rows = []
+    for school, school_results in breakdown['categories'].items():
+        for grade_key, grade_results in school_results['grades'].items():
+            rows.append({
+                'School': school,
+                'Grade': grade_key.replace('_', ' ').title(),
+                'Percent at Benchmark': grade_results['percent_above_benchmark'],
+                'Students': grade_results['students']
+            })
+    rows.sort(key=lambda row: (row['School'], row['Grade']))
+
+    fig = px.bar(
+        rows,
+        x='School',
+        y='Percent at Benchmark',
+        color='Grade',
+        barmode='group',
+        hover_data=['Students'],
+        title=f"{year} {assessment_type.title()}: Children at Benchmark by School"
+    )
+    fig.update_layout(yaxis_range=[0, 100])
+    return fig
+
+def improvement_distribution_data(year=2024, start_assessment='baseline', end_assessment='endline'):
+    return run_analysis_with_version('improvement-distribution', get_improvement_distribution,
+                                     year=year, start_assessment=start_assessment, end_assessment=end_assessment)
+
+def improvement_distribution_chart(distribution, year, start_assessment, end_assessment):
+    """Histogram of per-child EGRA improvement between two assessments, split by grade"""
+    rows = []
+    for grade_key, counts in distribution['grades'].items():
+        for count in counts:
+            rows.append({
+                'Grade': grade_key.replace('_', ' ').title(),
+                'Improvement': count['improvement'],
+                'Children': count['children']
+            })
+
+    fig = px.bar(
+        rows,
+        x='Improvement',
+        y='Children',
+        color='Grade',
+        barmode='overlay',
+        opacity=0.7,
+        title=f"{year} EGRA Improvement: {start_assessment.title()} to {end_assessment.title()}"
+    )
+    return fig
+
+# chart kind -> (data function, figure function)
+CHART_BUILDERS = {
+    'school_benchmark': (school_benchmark_data, school_benchmark_chart),
+    'improvement_distribution': (improvement_distribution_data, improvement_distribution_chart),
+}
+
+def _render_for_agent(spec):
+    try:
+        path = render_chart(spec)
+    except ValueError as e:
+        return {"error": str(e)}
+    except Exception as e:
+        # Image export failures (e.g. kaleido missing or broken) should not break the answer
+        return {"error": f"Chart could not be rendered: {e}"}
+    return {"chart": os.path.basename(path), "status": "The chart will be shown to the user below your answer."}
+
+# Chart tools for the 2023 agent
+@function_tool
+def chart_school_benchmarks_2023(assessment_type: str = 'endline'):
+    """2023-specific chart of the percent of children at benchmark per school"""
+    return _render_for_agent({'kind': 'school_benchmark', 'year': 2023, 'assessment_type': assessment_type})
+
+@function_tool
+def chart_improvement_distribution_2023(start_assessment: str = 'baseline', end_assessment: str = 'endline'):
+    """2023-specific chart of the distribution of EGRA score improvements"""
+    return _render_for_agent({'kind': 'improvement_distribution', 'year': 2023,
+                              'start_assessment': start_assessment, 'end_assessment': end_assessment})
+
+# Chart tools for the 2024 agent
+@function_tool
+def chart_school_benchmarks_2024(assessment_type: str = 'endline'):
+    """2024-specific chart of the percent of children at benchmark per school"""
+    return _render_for_agent({'kind': 'school_benchmark', 'year': 2024, 'assessment_type': assessment_type})
+
+@function_tool
+def chart_improvement_distribution_2024(start_assessment: str = 'baseline', end_assessment: str = 'endline'):
+    """2024-specific chart of the distribution of EGRA score improvements"""
+    return _render_for_agent({'kind': 'improvement_distribution', 'year': 2024,
+                              'start_assessment': start_assessment, 'end_assessment': end_assessment})
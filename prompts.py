@@ -18,7 +18,8 @@ The Grade R children improved their EGRA scores from 5 to 26.
 The Grade R children improved the number of letters they knew from 3 to 12. 
 
 #TOOLS
-If you need to know the number of children on the programme, you can use the get_2023_number_of_children function."""
+If you need to know the number of children on the programme, you can use the get_2023_number_of_children function.
+When comparing schools or describing improvement, you can use the chart_school_benchmarks_2023 and chart_improvement_distribution_2023 tools. The chart is shown to the user automatically, so just describe what it shows."""
 
 instructions_2024 = f"""You are a helpful data analyst specializing in early childhood literacy program evaluation. You help users understand the performance and impact of the Zazi iZandi literacy programme in 2024. 
 
@@ -43,6 +44,8 @@ You have access to the complete 2024 dataset and analytical tools to answer deta
 
 Always provide specific data-driven insights and cite exact numbers when available. When users ask about program impact or student progress, use the analytical tools to give comprehensive, accurate responses rather than relying only on the summary statistics above.
 
+When comparing schools or describing improvement, use the chart_school_benchmarks_2024 and chart_improvement_distribution_2024 tools. The chart is shown to the user automatically, so just describe what it shows.
+
 Be encouraging about the program's success while remaining objective about areas for improvement."""
 
 instructions_2025 = f"""You are a helpful data analyst. You help the user with understanding the performance of the Zazi iZandi literacy programme in 2025. {zz_background}. 
@@ -93,6 +96,7 @@ You can use:
 - `zazi_2023_agent` for 2023 programme information
 - `zazi_2024_agent` for 2024 programme information
 - If no year is specified, assume the user means 2024.
+- The 2023 and 2024 researchers can render charts (school benchmark comparisons, improvement distributions). Ask them for a chart when a comparison across schools or a distribution of gains would be clearer visually. Charts are attached to your answer automatically; do not include file names or links.
 
 Always aim to provide both **data and narrative** so users can make informed decisions and communicate the programme's impact effectively.
 
@@ -0,0 +1,299 @@
+from dotenv import load_dotenv
+import os
+import sys
+import json
+import random
+import asyncio
+import argparse
+import datetime
+import email.utils
+import httpx
+import pandas as pd
+from utilities import import_2023_results, import_2024_results
+from tools_2023_2024 import BENCHMARKS
+
+load_dotenv(override=True)
+
+# Weekly results digests for each school and each TA.
+# All digests are built from one grouped pass over the results, then sent through a
+# single pooled, rate-limited SendGrid client. Every successful send is journaled as it
+# completes, so a failed run can be re-run and will pick up where it stopped.
+
+SENDGRID_API_HOST = os.environ.get("SENDGRID_API_HOST", "https://api.sendgrid.com")
+REPORT_FROM_EMAIL = os.environ.get("REPORT_FROM_EMAIL", "jim@masinyusane.org")
+# Kept out of data/ so editing it does not change the results data version
+REPORT_RECIPIENTS_PATH = os.environ.get("REPORT_RECIPIENTS_PATH", "report_recipients.csv")
+REPORT_PROGRESS_DIR = os.environ.get("REPORT_PROGRESS_DIR", "report_progress")
+
+# BUILD DIGESTS
+
+def build_digests(year: int = 2024):
+    """
+    Build the results digest for every school and every TA in one pass over the data.
+
+    Args:
+        year: 2023 or 2024
+
+    Returns:
+        List of dictionaries with recipient_type ('school' or 'ta'), name, subject and body
+    """
+    if year == 2023:
+        data_df = import_2023_results()
+    elif year == 2024:
+        data_df = import_2024_results()
+    else:
+        raise ValueError("Year not found")
+
+    benchmarks = BENCHMARKS
+    assessments = [a for a in ('baseline', 'midline', 'endline') if f'EGRA {a.title()}' in data_df.columns]
+
+    df_clean = data_df[data_df['Grade'].isin(benchmarks.keys())].copy()
+    df_clean['TA Name'] = df_clean['TA Name'].fillna('Unknown TA')
+    benchmark_scores = df_clean['Grade'].map(benchmarks)
+
+    # One row per (School, TA, Grade) with counts and score totals for each assessment,
+    # which can then be rolled up to either school or TA level without touching the raw data again
+    agg_spec = {'children': ('Grade', 'size')}
+    for assessment in assessments:
+        col = f'EGRA {assessment.title()}'
+        df_clean[f'{assessment}_assessed'] = df_clean[col].notna()
+        df_clean[f'{assessment}_total'] = df_clean[col].fillna(0)
+        df_clean[f'{assessment}_at_benchmark'] = df_clean[col] >= benchmark_scores
+        for stat in ('assessed', 'total', 'at_benchmark'):
+            agg_spec[f'{assessment}_{stat}'] = (f'{assessment}_{stat}', 'sum')
+    grouped = df_clean.groupby(['School', 'TA Name', 'Grade']).agg(**agg_spec).reset_index()
+
+    digests = []
+    for recipient_type, column in (('school', 'School'), ('ta', 'TA Name')):
+        rolled_up = grouped.drop(columns=['TA Name' if column == 'School' else 'School'])
+        rolled_up = rolled_up.groupby([column, 'Grade']).sum(numeric_only=True)
+        for name in sorted(rolled_up.index.get_level_values(0).unique()):
+            digests.append(_render_digest(recipient_type, name, year, rolled_up.loc[name], assessments, benchmarks))
+
+    return digests
+
+def _render_digest(recipient_type, name, year, grade_rows, assessments, benchmarks):
+    lines = [f"Zazi iZandi {year} results for {name}", ""]
+    for grade_name, row in grade_rows.iterrows():
+        lines.append(f"{grade_name} ({int(row['children'])} children, benchmark {benchmarks[grade_name]})")
+        for assessment in assessments:
+            assessed = int(row[f'{assessment}_assessed'])
+            if assessed == 0:
+                continue
+            average = row[f'{assessment}_total'] / assessed
+            percent = row[f'{assessment}_at_benchmark'] / assessed * 100
+            lines.append(f"  {assessment.title()}: average EGRA {average:.1f}, {percent:.1f}% at benchmark ({assessed} assessed)")
+        lines.append("")
+
+    return {
+        'recipient_type': recipient_type,
+        'name': str(name),
+        'subject': f"Zazi iZandi weekly results: {name}",
+        'body': "\n".join(lines).rstrip() + "\n"
+    }
+
+def load_recipients(path: str = REPORT_RECIPIENTS_PATH):
+    """
+    Load the recipient directory: a CSV with recipient_type ('school' or 'ta'), name and email columns.
+
+    Rows with a blank recipient_type, name or email are skipped.
+
+    Returns:
+        Dictionary mapping (recipient_type, name) to email address
+    """
+    recipients_df = pd.read_csv(path, dtype=str, keep_default_na=False)
+    recipients = {}
+    for _, row in recipients_df.iterrows():
+        recipient_type = row['recipient_type'].strip().lower()
+        name = row['name'].strip()
+        email = row['email'].strip()
+        if recipient_type and name and email:
+            recipients[(recipient_type, name)] = email
+    return recipients
+
+# SEND DIGESTS
+
+class RateLimiter:
+    """Spaces out requests so no more than `rate` start per second"""
+
+    def __init__(self, rate: float):
+        self.interval = 1.0 / rate
+        self.next_slot = 0.0
+        self.lock = asyncio.Lock()
+
+    async def wait(self):
+        async with self.lock:
+            now = asyncio.get_running_loop().time()
+            delay = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+class MailClient:
+    """
+    Pooled async client for the SendGrid v3 mail send API.
+
+    One connection pool is shared by every message in a run. Requests are rate limited
+    and retried with exponential backoff on network errors, 429s and 5xx responses.
+    Point SENDGRID_API_HOST at a local stand-in to run without sending real email.
+    """
+
+    def __init__(self, api_key=None, api_host=SENDGRID_API_HOST, max_connections: int = 10,
+                 rate: float = 10.0, max_retries: int = 4, backoff: float = 1.0, transport=None):
+        self.api_key = api_key or os.environ.get('SENDGRID_API_KEY')
+        if not self.api_key:
+            # Otherwise every digest would fail separately with a 401
+            raise ValueError("SENDGRID_API_KEY is not set; set it or use --dry-run")
+        self.client = httpx.AsyncClient(
+            base_url=api_host,
+            headers={"Authorization": f"Bearer {self.api_key}"},
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=30.0,
+            transport=transport
+        )
+        self.rate_limiter = RateLimiter(rate)
+        self.max_retries = max_retries
+        self.backoff = backoff
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.client.aclose()
+
+    async def send(self, to_email: str, subject: str, body: str, from_email: str = REPORT_FROM_EMAIL):
+        """Send one plain text email, retrying transient failures. Raises if it never succeeds."""
+        mail = {
+            "personalizations": [{"to": [{"email": to_email}]}],
+            "from": {"email": from_email},
+            "subject": subject,
+            "content": [{"type": "text/plain", "value": body}]
+        }
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.wait()
+            retry_after = None
+            try:
+                response = await self.client.post("/v3/mail/send", json=mail)
+                if response.status_code < 400:
+                    return response.status_code
+                if response.status_code != 429 and response.status_code < 500:
+                    response.raise_for_status()
+                retry_after = response.headers.get("Retry-After")
+                error = httpx.HTTPStatusError(f"Mail API returned {response.status_code}",
+                                              request=response.request, response=response)
+            except httpx.TransportError as e:
+                error = e
+
+            if attempt == self.max_retries:
+                raise error
+            delay = _retry_after_seconds(retry_after)
+            if delay is None:
+                delay = self.backoff * 2 ** attempt
+            await asyncio.sleep(delay + random.uniform(0, self.backoff))
+
+def _retry_after_seconds(value):
+    """Parse a Retry-After header, which is either a number of seconds or an HTTP date"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=datetime.timezone.utc)
+    return max(0.0, (retry_at - datetime.datetime.now(datetime.timezone.utc)).total_seconds())
+
+def _load_progress(path):
+    if not os.path.exists(path):
+        return set()
+    with open(path) as f:
+        return {line.strip() for line in f if line.strip()}
+
+def _record_sent(journal, key):
+    # One line per delivered digest, flushed to disk before the next send completes
+    journal.write(key + "\n")
+    journal.flush()
+    os.fsync(journal.fileno())
+
+async def dispatch_digests(digests, recipients, run_id: str, client: MailClient, batch_size: int = 50):
+    """
+    Send digests in batches, journaling each digest as soon as it is delivered.
+
+    Args:
+        digests: Output of build_digests
+        recipients: Output of load_recipients
+        run_id: Identifies the run (e.g. '2025-W27'); re-running the same id skips digests already sent
+        client: MailClient to send with
+        batch_size: Number of digests sent concurrently
+
+    Returns:
+        Dictionary with counts of sent, skipped and failed digests, plus the failures
+    """
+    os.makedirs(REPORT_PROGRESS_DIR, exist_ok=True)
+    progress_path = os.path.join(REPORT_PROGRESS_DIR, f"{run_id}.log")
+    sent = _load_progress(progress_path)
+
+    results = {'run_id': run_id, 'sent': 0, 'already_sent': 0, 'no_recipient': [], 'failed': []}
+    pending = []
+    for digest in digests:
+        key = f"{digest['recipient_type']}:{digest['name']}"
+        email = recipients.get((digest['recipient_type'], digest['name']))
+        if key in sent:
+            results['already_sent'] += 1
+        elif email is None:
+            results['no_recipient'].append(key)
+        else:
+            pending.append((key, email, digest))
+
+    with open(progress_path, "a") as journal:
+        async def send_one(key, email, digest):
+            try:
+                await client.send(email, digest['subject'], digest['body'])
+            except Exception as e:
+                results['failed'].append({'digest': key, 'error': str(e)})
+                return
+            _record_sent(journal, key)
+            results['sent'] += 1
+
+        for start in range(0, len(pending), batch_size):
+            batch = pending[start:start + batch_size]
+            await asyncio.gather(*(send_one(key, email, digest) for key, email, digest in batch))
+
+    return results
+
+def send_weekly_digests(year: int = 2024, run_id=None, dry_run: bool = False):
+    """Build and send this week's digests. Intended to be run on a schedule (e.g. cron)."""
+    run_id = run_id or datetime.date.today().strftime("%G-W%V")
+    digests = build_digests(year)
+    if dry_run and not os.path.exists(REPORT_RECIPIENTS_PATH):
+        recipients = {}
+    else:
+        recipients = load_recipients()
+
+    if dry_run:
+        for digest in digests:
+            email = recipients.get((digest['recipient_type'], digest['name']), "NO RECIPIENT")
+            print(f"To: {email}\nSubject: {digest['subject']}\n\n{digest['body']}")
+        return {'run_id': run_id, 'digests': len(digests)}
+
+    async def run():
+        async with MailClient() as client:
+            return await dispatch_digests(digests, recipients, run_id, client)
+
+    return asyncio.run(run())
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Send the weekly Zazi iZandi results digests")
+    parser.add_argument("--year", type=int, default=2024)
+    parser.add_argument("--run-id", help="Re-use a previous run id to resume it, e.g. 2025-W27")
+    parser.add_argument("--dry-run", action="store_true", help="Print the digests instead of sending them")
+    args = parser.parse_args()
+
+    results = send_weekly_digests(args.year, args.run_id, args.dry_run)
+    print(json.dumps(results, indent=2))
+    if results.get('failed'):
+        sys.exit(1)
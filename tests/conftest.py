@@ -0,0 +1,9 @@
+import os
+import sys
+
+# The app modules live at the repository root rather than in a package
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if ROOT_DIR not in sys.path:
+    sys.path.insert(0, ROOT_DIR)
+# Data paths in utilities are relative to the repository root
+os.chdir(ROOT_DIR)
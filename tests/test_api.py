@@ -0,0 +1,208 @@
+import json
+import shutil
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+import api
+import utilities
+import analytics_client
+
+def strict_json(text):
+    def reject(constant):
+        raise ValueError(f"Invalid JSON constant: {constant}")
+    return json.loads(text, parse_constant=reject)
+
+@pytest.fixture
+def client():
+    api._results.clear()
+    return TestClient(api.app)
+
+def test_metric_accepts_query_string_parameters(client):
+    response = client.get("/api/metrics/benchmark-performance",
+                          params={"year": "2024", "assessment_type": "endline", "grade_filter": "Grade 1"})
+
+    assert response.status_code == 200
+    assert response.json()['benchmark'] == 40
+    assert response.headers["ETag"].startswith(f'"{utilities.get_data_version()}-')
+    assert response.headers["X-Data-Version"] == utilities.get_data_version()
+    assert "max-age" in response.headers["Cache-Control"]
+
+def test_every_year_metric_works_for_both_years(client):
+    for metric, (_, params_model) in api.METRICS.items():
+        if not issubclass(params_model, api.YearParams):
+            continue
+        for year in api.YEARS:
+            response = client.get(f"/api/metrics/{metric}", params={"year": str(year)})
+            assert response.status_code in (200, 400), (metric, year, response.text)
+
+def test_invalid_parameters_are_rejected(client):
+    assert client.get("/api/metrics/summary-statistics", params={"year": "2022"}).status_code == 422
+    assert client.get("/api/metrics/improvement", params={"start_assessment": "final"}).status_code == 422
+    assert client.get("/api/metrics/summary-statistics", params={"colour": "red"}).status_code == 422
+
+def test_matching_etag_returns_not_modified(client, monkeypatch):
+    first = client.get("/api/metrics/summary-statistics", params={"year": "2023"})
+    calls = []
+    monkeypatch.setitem(api.METRICS, 'summary-statistics',
+                        (lambda **params: calls.append(params), api.YearParams))
+
+    second = client.get("/api/metrics/summary-statistics", params={"year": "2023"},
+                        headers={"If-None-Match": first.headers["ETag"]})
+
+    assert second.status_code == 304
+    assert second.headers["ETag"] == first.headers["ETag"]
+    assert calls == []
+
+def test_responses_are_strict_json(client):
+    response = client.get("/api/metrics/data-info", params={"year": "2023"})
+
+    assert response.status_code == 200
+    assert strict_json(response.text)['sample_data']
+
+def test_number_of_children_2025(client):
+    response = client.get("/api/metrics/number-of-children-2025")
+
+    assert response.status_code == 200
+    assert response.json() == 2352
+
+def test_batch_reports_each_item_separately(client, monkeypatch):
+    def broken(year=2024):
+        raise TypeError("broken metric")
+
+    monkeypatch.setitem(api.METRICS, 'broken', (broken, api.YearParams))
+    response = client.post("/api/batch", json={"requests": [
+        {"metric": "benchmark-performance", "params": {"year": 2023, "grade_filter": "Grade R"}},
+        {"metric": "benchmark-performance", "params": {"year": 2024, "assessment_type": "final"}},
+        {"metric": "unknown"},
+        {"metric": "broken"},
+        {"metric": "number-of-children-2025"},
+    ]})
+
+    assert response.status_code == 200
+    assert "ETag" not in response.headers
+    results = strict_json(response.text)['results']
+    assert [r['status'] for r in results] == [200, 422, 404, 500, 200]
+    assert results[0]['data_version'] == utilities.get_data_version()
+    assert results[0]['data']['benchmark'] == 20
+    assert "broken metric" in results[3]['data']['error']
+    assert results[4]['data'] == 2352
+
+def test_editing_the_data_changes_version_and_results(client, tmp_path, monkeypatch):
+    results_2023 = tmp_path / "2023.csv"
+    shutil.copy(utilities.RESULTS_FILES[2023], results_2023)
+    monkeypatch.setitem(utilities.RESULTS_FILES, 2023, str(results_2023))
+
+    first = client.get("/api/metrics/summary-statistics", params={"year": "2023"})
+    lines = results_2023.read_text(encoding="utf-8-sig").splitlines(keepends=True)
+    results_2023.write_text("".join(lines[:101]), encoding="utf-8-sig")
+    second = client.get("/api/metrics/summary-statistics", params={"year": "2023"},
+                        headers={"If-None-Match": first.headers["ETag"]})
+
+    assert second.status_code == 200
+    assert second.headers["ETag"] != first.headers["ETag"]
+    assert second.json()['total_students'] == 100
+
+def api_transport(test_client, requests):
+    """httpx transport that forwards the AnalyticsClient's requests to the API under test"""
+    def handler(request):
+        requests.append(request)
+        response = test_client.request(request.method, request.url.path, params=request.url.params,
+                                       headers=request.headers, content=request.content)
+        return httpx.Response(response.status_code, headers=response.headers, content=response.content)
+    return httpx.MockTransport(handler)
+
+def test_analytics_client_revalidates_with_etag(client, monkeypatch):
+    monkeypatch.setattr(api, "ANALYTICS_CACHE_MAX_AGE", 0)
+    requests = []
+    analytics = analytics_client.AnalyticsClient("http://api.test", transport=api_transport(client, requests))
+
+    first = analytics.get_metric('benchmark-performance', year=2024, grade_filter=None)
+    second = analytics.get_metric('benchmark-performance', year=2024, grade_filter=None)
+
+    assert first == second
+    assert len(requests) == 2
+    assert "grade_filter" not in requests[0].url.params
+    assert requests[1].headers["If-None-Match"]
+
+def test_analytics_client_serves_fresh_responses_from_cache(client):
+    requests = []
+    analytics = analytics_client.AnalyticsClient("http://api.test", transport=api_transport(client, requests))
+
+    analytics.get_metric('summary-statistics', year=2023)
+    analytics.get_metric('summary-statistics', year=2023)
+
+    assert len(requests) == 1
+
+def test_analytics_client_reports_the_version_of_the_data_returned(client, tmp_path, monkeypatch):
+    monkeypatch.setattr(api, "ANALYTICS_CACHE_MAX_AGE", 0)
+    results_2023 = tmp_path / "2023.csv"
+    shutil.copy(utilities.RESULTS_FILES[2023], results_2023)
+    monkeypatch.setitem(utilities.RESULTS_FILES, 2023, str(results_2023))
+    analytics = analytics_client.AnalyticsClient("http://api.test", transport=api_transport(client, []))
+
+    first, first_version = analytics.get_metric_with_version('summary-statistics', year=2023)
+    lines = results_2023.read_text(encoding="utf-8-sig").splitlines(keepends=True)
+    results_2023.write_text("".join(lines[:101]), encoding="utf-8-sig")
+    second, second_version = analytics.get_metric_with_version('summary-statistics', year=2023)
+
+    assert first_version != second_version
+    assert second_version == utilities.get_data_version()
+    assert second['total_students'] == 100
+
+def test_reload_during_analysis_is_not_cached_under_the_old_version(client, tmp_path, monkeypatch):
+    results_2023 = tmp_path / "2023.csv"
+    shutil.copy(utilities.RESULTS_FILES[2023], results_2023)
+    monkeypatch.setitem(utilities.RESULTS_FILES, 2023, str(results_2023))
+    old_version = utilities.get_data_version()
+    lines = results_2023.read_text(encoding="utf-8-sig").splitlines(keepends=True)
+    edits = []
+
+    def edit_then_analyse(year=2024):
+        # The CSV is edited after the version was read but before the analysis loads it
+        if not edits:
+            edits.append(year)
+            results_2023.write_text("".join(lines[:101]), encoding="utf-8-sig")
+        return {'total_students': len(utilities.import_2023_results())}
+
+    monkeypatch.setitem(api.METRICS, 'summary-statistics', (edit_then_analyse, api.YearParams))
+    response = client.get("/api/metrics/summary-statistics", params={"year": "2023"})
+
+    assert response.json() == {'total_students': 100}
+    assert response.headers["X-Data-Version"] == utilities.get_data_version() != old_version
+    assert all(version != old_version for _, _, version in api._results)
+
+def test_analytics_client_returns_errors_in_tool_shape(client):
+    analytics = analytics_client.AnalyticsClient("http://api.test", transport=api_transport(client, []))
+
+    assert "error" in analytics.get_metric('performance-breakdown', year=2023, breakdown_by='Gender')
+    assert "Invalid parameters" in analytics.get_metric('summary-statistics', year=2025)['error']
+
+def test_analytics_client_batch(client):
+    analytics = analytics_client.AnalyticsClient("http://api.test", transport=api_transport(client, []))
+
+    results = analytics.get_metrics([
+        {"metric": "summary-statistics", "params": {"year": 2023}},
+        {"metric": "summary-statistics", "params": {"year": 2024}},
+    ])
+
+    assert [r['status'] for r in results] == [200, 200]
+
+def test_run_analysis_uses_the_api_when_configured(client, monkeypatch):
+    analytics = analytics_client.AnalyticsClient("http://api.test", transport=api_transport(client, []))
+    monkeypatch.setattr(analytics_client, "get_client", lambda: analytics)
+
+    def local(**params):
+        raise AssertionError("should not compute locally")
+
+    result = analytics_client.run_analysis('benchmark-performance', local, year=2023, grade_filter='Grade 1')
+    assert result['benchmark'] == 40
+
+def test_chart_data_carries_the_api_data_version(client, monkeypatch):
+    import charts
+    analytics = analytics_client.AnalyticsClient("http://api.test", transport=api_transport(client, []))
+    monkeypatch.setattr(analytics_client, "get_client", lambda: analytics)
+
+    breakdown, data_version = charts.school_benchmark_data(year=2023)
+
+    assert breakdown['breakdown_by'] == 'School'
+    assert data_version == utilities.get_data_version()
@@ -0,0 +1,34 @@
+import asyncio
+import pytest
+
+gr = pytest.importorskip("gradio")
+app = pytest.importorskip("app")
+import charts
+
+class StubResult:
+    final_output = "Here is the comparison."
+
+def run_chat(monkeypatch, rendered):
+    async def fake_run(agent, message):
+        for path in rendered:
+            charts._record_chart(path)
+        return StubResult()
+
+    monkeypatch.setattr(app.Runner, "run", fake_run)
+    return asyncio.run(app.chat_async("Compare the schools", []))
+
+def test_answer_without_charts_is_text(monkeypatch):
+    assert run_chat(monkeypatch, []) == "Here is the comparison."
+
+def test_answer_with_charts_includes_images(monkeypatch, tmp_path):
+    paths = []
+    for name in ("a.png", "b.png"):
+        path = tmp_path / name
+        path.write_bytes(b"\x89PNG")
+        paths.append(str(path))
+
+    response = run_chat(monkeypatch, paths)
+
+    assert response[0] == "Here is the comparison."
+    assert all(isinstance(image, gr.Image) for image in response[1:])
+    assert len(response) == 3
@@ -0,0 +1,132 @@
+import os
+import pytest
+import charts
+
+class StubFigure:
+    def __init__(self, size):
+        self.size = size
+
+    def write_image(self, path, format=None):
+        with open(path, "wb") as f:
+            f.write(b"x" * self.size)
+
+@pytest.fixture
+def chart_cache(tmp_path, monkeypatch):
+    """
+    Point the chart cache at a temporary directory and swap in a stub chart kind that counts renders.
+    The stub's data is reported as coming from data_version['current'].
+    """
+    renders = []
+    data_version = {'current': 'v1'}
+
+    def stub_data(year=2024, size=100):
+        return {'year': year, 'size': size}, data_version['current']
+
+    def stub_chart(data, year, size):
+        renders.append(year)
+        return StubFigure(size)
+
+    monkeypatch.setattr(charts, "CHART_CACHE_DIR", str(tmp_path))
+    monkeypatch.setitem(charts.CHART_BUILDERS, 'stub', (stub_data, stub_chart))
+    monkeypatch.delenv("ANALYTICS_API_URL", raising=False)
+    return renders, data_version
+
+def test_repeated_spec_is_served_from_cache(chart_cache):
+    renders, _ = chart_cache
+    first = charts.render_chart({'kind': 'stub', 'year': 2023})
+    second = charts.render_chart({'kind': 'stub', 'year': 2023})
+
+    assert first == second
+    assert renders == [2023]
+
+def test_defaults_map_to_the_same_cache_entry(chart_cache):
+    renders, _ = chart_cache
+    first = charts.render_chart({'kind': 'stub'})
+    second = charts.render_chart({'kind': 'stub', 'format': 'png', 'year': 2024, 'size': 100})
+
+    assert first == second
+    assert renders == [2024]
+
+def test_new_data_version_renders_again(chart_cache):
+    renders, data_version = chart_cache
+    first = charts.render_chart({'kind': 'stub'})
+    data_version['current'] = 'v2'
+    second = charts.render_chart({'kind': 'stub'})
+
+    assert first != second
+    assert len(renders) == 2
+
+def test_eviction_removes_least_recently_used(chart_cache, monkeypatch):
+    monkeypatch.setattr(charts, "CHART_CACHE_MAX_BYTES", 250)
+    oldest = charts.render_chart({'kind': 'stub', 'year': 2021})
+    used = charts.render_chart({'kind': 'stub', 'year': 2022})
+    os.utime(oldest, (1, 1))
+    os.utime(used, (2, 2))
+    # A cache hit refreshes the file, so it outlives the one that was not asked for again
+    charts.render_chart({'kind': 'stub', 'year': 2022})
+    newest = charts.render_chart({'kind': 'stub', 'year': 2023})
+
+    assert not os.path.exists(oldest)
+    assert os.path.exists(used)
+    assert os.path.exists(newest)
+
+def test_invalid_spec_is_rejected(chart_cache):
+    with pytest.raises(ValueError):
+        charts.render_chart({'kind': 'stub', 'colour': 'red'})
+    with pytest.raises(ValueError):
+        charts.render_chart({'kind': 'stub', 'format': 'gif'})
+    with pytest.raises(ValueError):
+        charts.render_chart({'kind': 'pie'})
+
+def test_render_failure_is_returned_as_error(chart_cache, monkeypatch):
+    def broken_chart(data):
+        raise RuntimeError("Kaleido requires Google Chrome")
+
+    monkeypatch.setitem(charts.CHART_BUILDERS, 'broken', (lambda: ({}, 'v1'), broken_chart))
+    result = charts._render_for_agent({'kind': 'broken'})
+
+    assert "Kaleido requires Google Chrome" in result['error']
+
+def test_data_errors_are_not_rendered(chart_cache, monkeypatch):
+    renders, _ = chart_cache
+    monkeypatch.setitem(charts.CHART_BUILDERS, 'missing',
+                        (lambda: ({'error': 'Column EGRA Midline not found'}, None), lambda data: None))
+
+    assert charts._render_for_agent({'kind': 'missing'}) == {'error': 'Column EGRA Midline not found'}
+    assert renders == []
+
+def test_charts_are_collected_per_chat_turn(chart_cache):
+    charts.render_chart({'kind': 'stub', 'year': 2023})
+    collected = charts.start_chart_collection()
+    path = charts.render_chart({'kind': 'stub', 'year': 2024})
+    charts.render_chart({'kind': 'stub', 'year': 2024})
+
+    assert collected == [path]
+    assert charts.start_chart_collection() == []
+
+def _image_export_available():
+    try:
+        import plotly.graph_objects as go
+        go.Figure().to_image(format='png')
+    except Exception:
+        return False
+    return True
+
+@pytest.mark.skipif(not _image_export_available(), reason="plotly image export (kaleido/Chrome) is not available")
+@pytest.mark.parametrize('image_format', ['png', 'svg'])
+@pytest.mark.parametrize('spec', [
+    {'kind': 'school_benchmark', 'year': 2024},
+    {'kind': 'improvement_distribution', 'year': 2023},
+])
+def test_real_charts_render(spec, image_format, tmp_path, monkeypatch):
+    monkeypatch.setattr(charts, "CHART_CACHE_DIR", str(tmp_path))
+    monkeypatch.delenv("ANALYTICS_API_URL", raising=False)
+
+    path = charts.render_chart({**spec, 'format': image_format})
+
+    with open(path, 'rb') as f:
+        header = f.read(512)
+    if image_format == 'png':
+        assert header.startswith(b'\x89PNG')
+    else:
+        assert b'<svg' in header
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import httpx
+import pytest
+import reports
+
+def stand_in_mail_api(responses):
+    """
+    Local stand-in for the SendGrid mail send API.
+    responses maps a recipient address to the status codes (and headers) to answer with, in order;
+    once the list runs out every request for that address gets a 202.
+    """
+    calls = []
+
+    def handler(request):
+        to_email = json.loads(request.content)['personalizations'][0]['to'][0]['email']
+        calls.append(to_email)
+        queued = responses.get(to_email, [])
+        status, headers = queued.pop(0) if queued else (202, {})
+        return httpx.Response(status, headers=headers)
+
+    return httpx.MockTransport(handler), calls
+
+def mail_client(transport, max_retries=2):
+    return reports.MailClient(api_key="test", api_host="http://mail.test", rate=1000,
+                              max_retries=max_retries, backoff=0, transport=transport)
+
+def send(transport, to_email="a@test", max_retries=2):
+    async def run():
+        async with mail_client(transport, max_retries) as client:
+            return await client.send(to_email, "Subject", "Body")
+    return asyncio.run(run())
+
+DIGESTS = [
+    {'recipient_type': 'school', 'name': 'School 1', 'subject': 'S1', 'body': 'Body 1'},
+    {'recipient_type': 'school', 'name': 'School 2', 'subject': 'S2', 'body': 'Body 2'},
+    {'recipient_type': 'ta', 'name': 'EA 1', 'subject': 'EA1', 'body': 'Body 3'},
+]
+
+RECIPIENTS = {
+    ('school', 'School 1'): 'school1@test',
+    ('school', 'School 2'): 'school2@test',
+}
+
+def dispatch(transport, run_id="2025-W27"):
+    async def run():
+        async with mail_client(transport, max_retries=0) as client:
+            return await reports.dispatch_digests(DIGESTS, RECIPIENTS, run_id, client)
+    return asyncio.run(run())
+
+def test_retries_rate_limits_and_server_errors():
+    transport, calls = stand_in_mail_api({'a@test': [(429, {'Retry-After': '0'}), (503, {})]})
+
+    assert send(transport) == 202
+    assert calls == ['a@test'] * 3
+
+def test_retry_after_http_date_is_respected():
+    transport, calls = stand_in_mail_api({'a@test': [(429, {'Retry-After': 'Wed, 21 Oct 2015 07:28:00 GMT'})]})
+
+    assert send(transport) == 202
+    assert len(calls) == 2
+
+def test_retry_after_parsing():
+    assert reports._retry_after_seconds('5') == 5.0
+    assert reports._retry_after_seconds('Wed, 21 Oct 2015 07:28:00 GMT') == 0.0
+    assert reports._retry_after_seconds('soon') is None
+    assert reports._retry_after_seconds(None) is None
+
+def test_client_errors_are_not_retried():
+    transport, calls = stand_in_mail_api({'a@test': [(400, {})]})
+
+    with pytest.raises(httpx.HTTPStatusError):
+        send(transport)
+    assert calls == ['a@test']
+
+def test_gives_up_after_max_retries():
+    transport, calls = stand_in_mail_api({'a@test': [(500, {})] * 5})
+
+    with pytest.raises(httpx.HTTPStatusError):
+        send(transport, max_retries=2)
+    assert len(calls) == 3
+
+def test_resume_sends_only_what_failed(tmp_path, monkeypatch):
+    monkeypatch.setattr(reports, "REPORT_PROGRESS_DIR", str(tmp_path))
+
+    transport, calls = stand_in_mail_api({'school2@test': [(500, {})]})
+    first = dispatch(transport)
+    assert first['sent'] == 1
+    assert [f['digest'] for f in first['failed']] == ['school:School 2']
+    assert first['no_recipient'] == ['ta:EA 1']
+    # The delivered digest is journaled as soon as it is sent
+    assert (tmp_path / "2025-W27.log").read_text().splitlines() == ['school:School 1']
+
+    transport, calls = stand_in_mail_api({})
+    second = dispatch(transport)
+    assert second['sent'] == 1
+    assert second['already_sent'] == 1
+    assert second['failed'] == []
+    assert calls == ['school2@test']
+
+    # A new run id starts from scratch
+    transport, calls = stand_in_mail_api({})
+    assert dispatch(transport, run_id="2025-W28")['sent'] == 2
+
+def test_digests_use_shared_benchmarks():
+    digests = reports.build_digests(2024)
+    school_digests = [d for d in digests if d['recipient_type'] == 'school']
+
+    assert school_digests
+    assert any(d['recipient_type'] == 'ta' for d in digests)
+    assert "benchmark 40" in "".join(d['body'] for d in school_digests)
+
+def test_missing_api_key_fails_before_sending(monkeypatch):
+    monkeypatch.delenv("SENDGRID_API_KEY", raising=False)
+
+    with pytest.raises(ValueError, match="SENDGRID_API_KEY"):
+        reports.MailClient(api_host="http://mail.test")
+
+def test_load_recipients_skips_incomplete_rows(tmp_path):
+    path = tmp_path / "recipients.csv"
+    path.write_text(
+        "recipient_type,name,email\n"
+        "school,School 1,school1@test\n"
+        "TA , EA 1 , ea1@test \n"
+        ",School 2,school2@test\n"
+        "school,,school3@test\n"
+        "school,School 4,\n"
+    )
+
+    assert reports.load_recipients(str(path)) == {
+        ('school', 'School 1'): 'school1@test',
+        ('ta', 'EA 1'): 'ea1@test',
+    }
@@ -1,11 +1,18 @@
 from agents import Agent, Runner, trace, function_tool
 from utilities import import_2023_results, import_2024_results, import_2025_results
+from analytics_client import run_analysis
 
-@function_tool
-def get_2025_number_of_children():
+def number_of_children_2025():
     """
-    Get the number of children on the programme in 2024
+    Get the number of children on the programme in 2025
     """
     initial_df, midline_df = import_2025_results()
     number_of_children = len(midline_df)
-    return number_of_children
\ No newline at end of file
+    return number_of_children
+
+@function_tool
+def get_2025_number_of_children():
+    """
+    Get the number of children on the programme in 2025
+    """
+    return run_analysis('number-of-children-2025', number_of_children_2025)
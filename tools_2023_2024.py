@@ -1,16 +1,17 @@
 import pandas as pd
 import numpy as np
 from utilities import import_2024_results, import_2023_results
+from analytics_client import run_analysis
 from agents import function_tool
 from typing import Optional
 
-# Load data once at module level
-df_2023 = import_2023_results()
-df_2024 = import_2024_results()
-# Default reference for any remaining legacy code
-df = df_2024
+# Data is loaded on first use and reloaded when the CSVs change (see utilities)
+# The year-generic functions below are plain functions so they can be reused
+# (charts, year wrappers); only the year-specific wrappers are agent tools.
+
+# EGRA benchmark score per grade, shared with the weekly digests in reports.py
+BENCHMARKS = {'Grade R': 20, 'Grade 1': 40}
 
-@function_tool
 def get_benchmark_performance(year: int = 2024, assessment_type: str = 'endline', grade_filter: Optional[str] = None):
     """
     Calculate percentage of children above benchmark for specified assessment.
@@ -24,15 +25,12 @@ def get_benchmark_performance(year: int = 2024, assessment_type: str = 'endline'
     """
     
     if year == 2023:
-        df = df_2023.copy()
+        df = import_2023_results().copy()
     elif year == 2024:
-        df = df_2024.copy()
+        df = import_2024_results().copy()
     else:
         return {"error": "Year not found"}
     
-    # Define benchmarks
-    benchmarks = {'Grade R': 20, 'Grade 1': 40}
-    
     # Filter by grade if specified
     if grade_filter:
         df_filtered = df[df['Grade'] == grade_filter].copy()
@@ -49,7 +47,7 @@ def get_benchmark_performance(year: int = 2024, assessment_type: str = 'endline'
     
     if grade_filter:
         # Single grade analysis - fix the benchmark lookup
-        benchmark = benchmarks.get(grade_filter, 20)  # Use full grade name
+        benchmark = BENCHMARKS.get(grade_filter, 20)  # Use full grade name
         scores = df_filtered[egra_col].dropna()
         above_benchmark = (scores >= benchmark).sum()
         total_students = len(scores)
@@ -66,7 +64,7 @@ def get_benchmark_performance(year: int = 2024, assessment_type: str = 'endline'
         }
     else:
         # All grades analysis
-        for grade_name, benchmark_score in benchmarks.items():
+        for grade_name, benchmark_score in BENCHMARKS.items():
             grade_data = df_filtered[df_filtered['Grade'] == grade_name]
             if len(grade_data) > 0:
                 scores = grade_data[egra_col].dropna()
@@ -92,7 +90,6 @@ def get_benchmark_performance(year: int = 2024, assessment_type: str = 'endline'
     
     return results
 
-@function_tool
 def calculate_improvement(year: int = 2024, start_assessment: str = 'baseline', end_assessment: str = 'endline'):
     """
     Calculate improvement from one assessment to another.
@@ -107,9 +104,9 @@ def calculate_improvement(year: int = 2024, start_assessment: str = 'baseline',
     """
     # Load appropriate dataset based on year
     if year == 2023:
-        data_df = df_2023.copy()
+        data_df = import_2023_results().copy()
     elif year == 2024:
-        data_df = df_2024.copy()
+        data_df = import_2024_results().copy()
     else:
         return {"error": "Year not found"}
     
@@ -144,9 +141,8 @@ def calculate_improvement(year: int = 2024, start_assessment: str = 'baseline',
         'median_improvement': round(df_clean['improvement'].median(), 1)
     }
     
-    # Grade-level breakdown - fix to match actual grade values
-    benchmarks = {'Grade R': 20, 'Grade 1': 40}
-    for grade_name in benchmarks.keys():
+    # Grade-level breakdown
+    for grade_name in BENCHMARKS.keys():
         grade_data = df_clean[df_clean['Grade'] == grade_name]
         if len(grade_data) > 0:
             grade_improved = (grade_data['improvement'] > 0).sum()
@@ -160,7 +156,52 @@ def calculate_improvement(year: int = 2024, start_assessment: str = 'baseline',
     
     return results
 
-@function_tool
+def get_improvement_distribution(year: int = 2024, start_assessment: str = 'baseline', end_assessment: str = 'endline'):
+    """
+    Count how many children improved by each amount from one assessment to another.
+    
+    Args:
+        year: 2023 or 2024
+        start_assessment: 'baseline', 'midline', or 'endline'
+        end_assessment: 'baseline', 'midline', or 'endline'
+    
+    Returns:
+        Dictionary with, per grade, a list of improvement amounts and the number of children
+    """
+    # Load appropriate dataset based on year
+    if year == 2023:
+        data_df = import_2023_results().copy()
+    elif year == 2024:
+        data_df = import_2024_results().copy()
+    else:
+        return {"error": "Year not found"}
+    
+    start_col = f'EGRA {start_assessment.title()}'
+    end_col = f'EGRA {end_assessment.title()}'
+    
+    if start_col not in data_df.columns or end_col not in data_df.columns:
+        return {"error": f"Required columns not found: {start_col}, {end_col}"}
+    
+    df_clean = data_df[[start_col, end_col, 'Grade']].dropna()
+    df_clean['improvement'] = df_clean[end_col] - df_clean[start_col]
+    
+    results = {
+        'assessment_period': f"{start_assessment} to {end_assessment}",
+        'grades': {}
+    }
+    
+    for grade_name in BENCHMARKS.keys():
+        grade_data = df_clean[df_clean['Grade'] == grade_name]
+        if len(grade_data) > 0:
+            counts = grade_data['improvement'].value_counts().sort_index()
+            grade_key = grade_name.replace(' ', '_').lower()
+            results['grades'][grade_key] = [
+                {'improvement': improvement, 'children': children}
+                for improvement, children in counts.items()
+            ]
+    
+    return results
+
 def get_performance_breakdown(year: int = 2024, breakdown_by: str = 'School', assessment_type: str = 'endline'):
     """
     Get performance breakdown by specified category.
@@ -175,9 +216,9 @@ def get_performance_breakdown(year: int = 2024, breakdown_by: str = 'School', as
     """
     # Load appropriate dataset based on year
     if year == 2023:
-        data_df = df_2023.copy()
+        data_df = import_2023_results().copy()
     elif year == 2024:
-        data_df = df_2024.copy()
+        data_df = import_2024_results().copy()
     else:
         return {"error": "Year not found"}
         
@@ -198,8 +239,6 @@ def get_performance_breakdown(year: int = 2024, breakdown_by: str = 'School', as
         'categories': {}
     }
     
-    benchmarks = {'Grade R': 20, 'Grade 1': 40}
-    
     for category in df_clean[breakdown_by].unique():
         category_data = df_clean[df_clean[breakdown_by] == category]
         
@@ -211,7 +250,7 @@ def get_performance_breakdown(year: int = 2024, breakdown_by: str = 'School', as
         }
         
         # Breakdown by grade within category
-        for grade_name, benchmark_score in benchmarks.items():
+        for grade_name, benchmark_score in BENCHMARKS.items():
             grade_data = category_data[category_data['Grade'] == grade_name]
             if len(grade_data) > 0:
                 scores = grade_data[egra_col]
@@ -229,7 +268,6 @@ def get_performance_breakdown(year: int = 2024, breakdown_by: str = 'School', as
     
     return results
 
-@function_tool
 def identify_students_needing_support(year: int = 2024, assessment_type: str = 'endline', bottom_percentile: int = 25):
     """
     Identify students who need the most support based on low scores.
@@ -244,9 +282,9 @@ def identify_students_needing_support(year: int = 2024, assessment_type: str = '
     """
     # Load appropriate dataset based on year
     if year == 2023:
-        data_df = df_2023.copy()
+        data_df = import_2023_results().copy()
     elif year == 2024:
-        data_df = df_2024.copy()
+        data_df = import_2024_results().copy()
     else:
         return {"error": "Year not found"}
         
@@ -281,10 +319,9 @@ def identify_students_needing_support(year: int = 2024, assessment_type: str = '
         'students': []
     }
     
-    # Format student information - fix benchmark lookup
-    benchmarks = {'Grade R': 20, 'Grade 1': 40}
+    # Format student information
     for _, student in students_needing_support.iterrows():
-        benchmark = benchmarks.get(student['Grade'], 20)
+        benchmark = BENCHMARKS.get(student['Grade'], 20)
         student_info = {
             'mcode': student['Mcode'],
             'name': student['Name'],
@@ -300,7 +337,6 @@ def identify_students_needing_support(year: int = 2024, assessment_type: str = '
     
     return results
 
-@function_tool
 def get_summary_statistics(year: int = 2024):
     """
     Get overall summary statistics for all assessments.
@@ -313,9 +349,9 @@ def get_summary_statistics(year: int = 2024):
     """
     # Load appropriate dataset based on year
     if year == 2023:
-        data_df = df_2023.copy()
+        data_df = import_2023_results().copy()
     elif year == 2024:
-        data_df = df_2024.copy()
+        data_df = import_2024_results().copy()
     else:
         return {"error": "Year not found"}
         
@@ -348,7 +384,6 @@ def get_summary_statistics(year: int = 2024):
     
     return results
 
-@function_tool
 def analyze_program_effectiveness(year: int = 2024):
     """Comprehensive program effectiveness analysis"""
     baseline_bench = get_benchmark_performance(year, 'baseline')
@@ -361,20 +396,18 @@ def analyze_program_effectiveness(year: int = 2024):
         'improvement_analysis': improvement
     }
     
-@function_tool
 def school_comparison_report(year: int = 2024):
     """Compare performance across schools"""
     return get_performance_breakdown(year, 'School', 'endline')
 
 # Optional: Add a function to get available data info for the agent
-@function_tool
 def get_data_info(year: int = 2024):
     """Get information about the available data for the agent to understand what it's working with"""
     # Load appropriate dataset based on year
     if year == 2023:
-        data_df = df_2023.copy()
+        data_df = import_2023_results().copy()
     elif year == 2024:
-        data_df = df_2024.copy()
+        data_df = import_2024_results().copy()
     else:
         return {"error": "Year not found"}
         
@@ -387,83 +420,84 @@ def get_data_info(year: int = 2024):
     }
 
 # Wrapper functions for 2023-specific calls (for the 2023 agent)
+# These run on the shared analytics API (api.py) when ANALYTICS_API_URL is set
 @function_tool
 def get_benchmark_performance_2023(assessment_type: str = 'endline', grade_filter: Optional[str] = None):
     """2023-specific benchmark performance analysis"""
-    return get_benchmark_performance(2023, assessment_type, grade_filter)
+    return run_analysis('benchmark-performance', get_benchmark_performance, year=2023, assessment_type=assessment_type, grade_filter=grade_filter)
 
 @function_tool
 def calculate_improvement_2023(start_assessment: str = 'baseline', end_assessment: str = 'endline'):
     """2023-specific improvement analysis"""
-    return calculate_improvement(2023, start_assessment, end_assessment)
+    return run_analysis('improvement', calculate_improvement, year=2023, start_assessment=start_assessment, end_assessment=end_assessment)
 
 @function_tool
 def get_performance_breakdown_2023(breakdown_by: str = 'School', assessment_type: str = 'endline'):
     """2023-specific performance breakdown"""
-    return get_performance_breakdown(2023, breakdown_by, assessment_type)
+    return run_analysis('performance-breakdown', get_performance_breakdown, year=2023, breakdown_by=breakdown_by, assessment_type=assessment_type)
 
 @function_tool
 def identify_students_needing_support_2023(assessment_type: str = 'endline', bottom_percentile: int = 25):
     """2023-specific student support identification"""
-    return identify_students_needing_support(2023, assessment_type, bottom_percentile)
+    return run_analysis('students-needing-support', identify_students_needing_support, year=2023, assessment_type=assessment_type, bottom_percentile=bottom_percentile)
 
 @function_tool
 def get_summary_statistics_2023():
     """2023-specific summary statistics"""
-    return get_summary_statistics(2023)
+    return run_analysis('summary-statistics', get_summary_statistics, year=2023)
 
 @function_tool
 def analyze_program_effectiveness_2023():
     """2023-specific program effectiveness analysis"""
-    return analyze_program_effectiveness(2023)
+    return run_analysis('program-effectiveness', analyze_program_effectiveness, year=2023)
 
 @function_tool
 def school_comparison_report_2023():
     """2023-specific school comparison"""
-    return school_comparison_report(2023)
+    return run_analysis('school-comparison', school_comparison_report, year=2023)
 
 @function_tool
 def get_data_info_2023():
     """2023-specific data information"""
-    return get_data_info(2023)
+    return run_analysis('data-info', get_data_info, year=2023)
 
 # Wrapper functions for 2024-specific calls (for the 2024 agent)
 @function_tool
 def get_benchmark_performance_2024(assessment_type: str = 'endline', grade_filter: Optional[str] = None):
     """2024-specific benchmark performance analysis"""
-    return get_benchmark_performance(2024, assessment_type, grade_filter)
+    return run_analysis('benchmark-performance', get_benchmark_performance, year=2024, assessment_type=assessment_type, grade_filter=grade_filter)
 
 @function_tool
 def calculate_improvement_2024(start_assessment: str = 'baseline', end_assessment: str = 'endline'):
     """2024-specific improvement analysis"""
-    return calculate_improvement(2024, start_assessment, end_assessment)
+    return run_analysis('improvement', calculate_improvement, year=2024, start_assessment=start_assessment, end_assessment=end_assessment)
 
 @function_tool
 def get_performance_breakdown_2024(breakdown_by: str = 'School', assessment_type: str = 'endline'):
     """2024-specific performance breakdown"""
-    return get_performance_breakdown(2024, breakdown_by, assessment_type)
+    return run_analysis('performance-breakdown', get_performance_breakdown, year=2024, breakdown_by=breakdown_by, assessment_type=assessment_type)
 
 @function_tool
 def identify_students_needing_support_2024(assessment_type: str = 'endline', bottom_percentile: int = 25):
     """2024-specific student support identification"""
-    return identify_students_needing_support(2024, assessment_type, bottom_percentile)
+    return run_analysis('students-needing-support', identify_students_needing_support, year=2024, assessment_type=assessment_type, bottom_percentile=bottom_percentile)
 
 @function_tool
 def get_summary_statistics_2024():
     """2024-specific summary statistics"""
-    return get_summary_statistics(2024)
+    return run_analysis('summary-statistics', get_summary_statistics, year=2024)
 
 @function_tool
 def analyze_program_effectiveness_2024():
     """2024-specific program effectiveness analysis"""
-    return analyze_program_effectiveness(2024)
+    return run_analysis('program-effectiveness', analyze_program_effectiveness, year=2024)
 
 @function_tool
 def school_comparison_report_2024():
     """2024-specific school comparison"""
-    return school_comparison_report(2024)
+    return run_analysis('school-comparison', school_comparison_report, year=2024)
 
 @function_tool
 def get_data_info_2024():
     """2024-specific data information"""
-    return get_data_info(2024)
\ No newline at end of file
+    return run_analysis('data-info', get_data_info, year=2024)
\ No newline at end of file
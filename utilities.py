@@ -2,6 +2,8 @@ from sendgrid.helpers.mail import Mail, Email, To, Content
 import sendgrid
 import os
 import sys
+import io
+import hashlib
 import pandas as pd
 
 def send_test_email():
@@ -20,24 +22,76 @@ if root_dir not in sys.path:
 
 # IMPORT DATA FOR THE TOOLS
 
+RESULTS_FILES = {
+    2023: "data/2023 Results - Simple (Anonymized).csv",
+    2024: "data/2024 Results - Simple (Anonymized).csv",
+    2025: "data/2025 Results - Simple (Anonymized).csv",
+}
+
+# path -> ((size, mtime), dataframe, content hash)
+_results_cache = {}
+
+def _load_results_file(path):
+    """
+    Read a results CSV, re-reading it only when its size or modification time changes.
+    The content hash is taken from the same bytes the dataframe was parsed from,
+    so the data version always describes the data actually in memory.
+    """
+    signature = (os.path.getsize(path), os.path.getmtime(path))
+    cached = _results_cache.get(path)
+    if cached is None or cached[0] != signature:
+        with open(path, "rb") as f:
+            content = f.read()
+        cached = (signature, pd.read_csv(io.BytesIO(content)), hashlib.sha256(content).hexdigest())
+        _results_cache[path] = cached
+    return cached
+
 #2023 Data
 
+# The results dataframes are shared between callers, so copy them before modifying
 def import_2023_results():
     # Import dataframes
-    df = pd.read_csv("data/2023 Results - Simple (Anonymized).csv")
+    df = _load_results_file(RESULTS_FILES[2023])[1]
     return df
 
 def import_2024_results():
-    df = pd.read_csv("data/2024 Results - Simple (Anonymized).csv")
+    df = _load_results_file(RESULTS_FILES[2024])[1]
     return df
 
 
 def import_2025_results():
     # Load data
-    df = pd.read_csv("data/2025 Results - Simple (Anonymized).csv")
+    df = _load_results_file(RESULTS_FILES[2025])[1]
 
     # Create initial and midline datasets for comparison charts
-    initial_df = df[df['submission_date'] < pd.Timestamp('2025-04-15')]
-    midline_df = df[df['submission_date'] >= pd.Timestamp('2025-04-15')]
+    submission_dates = pd.to_datetime(df['submission_date'], format='%m/%d/%y')
+    initial_df = df[submission_dates < pd.Timestamp('2025-04-15')]
+    midline_df = df[submission_dates >= pd.Timestamp('2025-04-15')]
     
-    return initial_df, midline_df
\ No newline at end of file
+    return initial_df, midline_df
+
+
+# DATA VERSION
+
+def get_data_version():
+    """
+    Short content hash of the results files, as currently loaded.
+    Changes whenever a results file is edited (the file is reloaded at the same time).
+    """
+    digest = hashlib.sha256()
+    for year, path in sorted(RESULTS_FILES.items()):
+        digest.update(f"{year}:{_load_results_file(path)[2]}".encode())
+    return digest.hexdigest()[:16]
+
+def compute_with_version(function, **params):
+    """
+    Run an analysis function and return (result, data_version) for the data it actually used.
+    If a results file is reloaded while the function runs, the version before and after
+    differ and we cannot tell which data it saw, so it is run again.
+    """
+    for _ in range(3):
+        data_version = get_data_version()
+        result = function(**params)
+        if get_data_version() == data_version:
+            return result, data_version
+    raise RuntimeError("The results data kept changing while the analysis was running")